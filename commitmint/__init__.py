@@ -2,4 +2,12 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 env_path = Path.cwd() / ".env"
-load_dotenv(dotenv_path=env_path)
\ No newline at end of file
+load_dotenv(dotenv_path=env_path)
+
+
+def __getattr__(name: str):
+    # Resolve provider helpers on first access so importing the package stays cheap
+    if name == "check_api_key":
+        from .providers import check_api_key
+        return check_api_key
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,5 @@
+import sys
+
+from .cli import app
+
+sys.exit(app(prog_name="mint"))
\ No newline at end of file
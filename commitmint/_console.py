@@ -0,0 +1,8 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def get_console():
+    # Shared Console, built on first use so commands that never print skip the terminal probing
+    from rich.console import Console
+    return Console()
\ No newline at end of file
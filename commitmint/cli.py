@@ -1,30 +1,54 @@
+import io
+import sys
+from dataclasses import asdict
 from pathlib import Path
 
 import typer
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Prompt, Confirm
-from rich.table import Table
 
-from . import git_handler
-from .generator import generate_messages
-from .providers import Provider, check_api_key, get_provider_info, DEFAULT_MODELS
-from .config import load_config, save_config, create_default_config, get_config_path
+from ._console import get_console
+from .providers_types import Provider, DEFAULT_MODELS, get_provider_info
 
 app = typer.Typer(help="CommitMint - the freshest AI-Powered Git Commit Message Generator",
                   add_completion=False,
                   rich_markup_mode="rich")
-console = Console()
+
+
+def _emit(renderable) -> None:
+    # Render off-screen and hand the terminal a single write instead of one per row
+    from rich.console import Console
+
+    console = get_console()
+    buffer = io.StringIO()
+    Console(
+        file=buffer,
+        force_terminal=console.is_terminal,
+        color_system=console.color_system,
+        width=console.width,
+    ).print(renderable)
+    console.file.write(buffer.getvalue())
+
+
+_OPT_UNSTAGED = typer.Option(False, "--unstaged", "-u", help="Use unstaged changes instead of staged")
+_OPT_AUTO_COMMIT = typer.Option(None, "--commit", "-c", help="Automatically commit with selected message")
+_OPT_PROVIDER = typer.Option(None, "--provider", "-p", help="LLM provider to use")
+_OPT_MODEL = typer.Option(None, "--model", "-m", help="Model name (uses provider default if not specified)")
+_OPT_TEMPERATURE = typer.Option(None, "--temp", "-t", help="Generation temperature (0.0 - 1.0)")
+_OPT_NO_CACHE = typer.Option(False, "--no-cache", help="Ignore cached results and ask the model again")
 
 
 @app.command(help="Generated commit messages from your git changes")
 def generate(
-        use_unstaged: bool = typer.Option(False, "--unstaged", "-u", help="Use unstaged changes instead of staged"),
-        auto_commit: bool = typer.Option(None, "--commit", "-c", help="Automatically commit with selected message"),
-        provider: Provider = typer.Option(None, "--provider", "-p", help="LLM provider to use"),
-        model: str = typer.Option(None, "--model", "-m", help="Model name (uses provider default if not specified)"),
-        temperature: float = typer.Option(None, "--temp", "-t", help="Generation temperature (0.0 - 1.0)"),
+        use_unstaged: bool = _OPT_UNSTAGED,
+        auto_commit: bool = _OPT_AUTO_COMMIT,
+        provider: Provider = _OPT_PROVIDER,
+        model: str = _OPT_MODEL,
+        temperature: float = _OPT_TEMPERATURE,
+        no_cache: bool = _OPT_NO_CACHE,
 ):
+    from .config import load_config
+
+    console = get_console()
+
     # Load config and override with CLI args
     cfg = load_config()
 
@@ -39,7 +63,9 @@ def generate(
 
     console.print("[bold blue]mint[/bold blue] - Generating commit messages...\n")
 
-    # Check API key for provider
+    # Check API key for provider before git or any LLM SDK is imported
+    from .providers import check_api_key
+
     if not check_api_key(cfg.provider):
         provider_info = get_provider_info(cfg.provider)
         console.print(f"[red]Error: {provider_info['api_key_var']} not set![/red]")
@@ -47,32 +73,65 @@ def generate(
         console.print(f"  {provider_info['api_key_var']}=your-api-key-here")
         raise typer.Exit(1)
 
+    # Only pay for git and the LLM SDKs once we know we can use them
+    from rich.panel import Panel
+    from rich.prompt import Prompt, Confirm
+    from rich.table import Table
+
+    from . import git_handler
+    from .generator import generate_messages, usable_fallbacks
+    from .models import CommitOptions
+
     model_name = cfg.get_model()
-    console.print(f"[dim]Using {cfg.provider.value} with model: {model_name}[/dim]\n")
+    console.print(f"[dim]Using {cfg.provider.value} with model: {model_name}[/dim]")
+    backups = usable_fallbacks(cfg.provider, cfg.fallback_providers)
+    if backups:
+        console.print(f"[dim]Falling back to: {', '.join(p.value for p in backups)}[/dim]")
+    console.print()
 
     try:
         # Get diff
-        if use_unstaged:
-            diff = git_handler.get_unstaged_diff()
-            if not diff:
+        # Patch text and per-file stats come from a single git call
+        git_ctx = git_handler.load_git_context(staged=not use_unstaged)
+        if not git_ctx.diff:
+            if use_unstaged:
                 console.print("[yellow]No unstaged changes found.[/yellow]")
-                raise typer.Exit()
-        else:
-            if not git_handler.has_staged_changes():
+            else:
                 console.print("[yellow]No staged changes found. Stage your changes with 'git add' first.[/yellow]")
-                raise typer.Exit()
-            diff = git_handler.get_staged_diff()
-
-        analysis = git_handler.parse_diff(diff)
-
-        # Generate commit messages
-        with console.status("[bold green]Analyzing changes and generating messages..."):
-            options = generate_messages(diff, analysis)
-
-        if not options or not options.options:
+            raise typer.Exit()
+
+        diff, analysis = git_ctx.diff, git_ctx.analysis
+
+        # Generate commit messages, counting options in as they stream back
+        messages = []
+        served_by = [cfg.provider]
+        with console.status("[bold green]Analyzing changes and generating messages...") as status:
+            for message in generate_messages(
+                diff, analysis,
+                provider=cfg.provider,
+                model_name=model_name,
+                temperature=cfg.temperature,
+                fallback_providers=backups,
+                use_cache=not no_cache,
+                on_fallback=served_by.append
+            ):
+                messages.append(message)
+                status.update(f"[bold green]Generating messages... ({len(messages)} ready)")
+
+        if served_by[-1] != cfg.provider:
+            console.print(f"[yellow]{cfg.provider.value} failed; messages generated by {served_by[-1].value}.[/yellow]")
+
+        if not messages:
             console.print("[red]Failed to generate commit messages.[/red]")
             raise typer.Exit(1)
 
+        options = CommitOptions(options=messages)
+
+        # Format each option once; the selection loop can redisplay them repeatedly
+        formatted_short = [msg.format(include_body=False) for msg in options.options]
+        formatted_full = [msg.format() for msg in options.options]
+        choices = [*options.option_choices, "preview", "quit"]
+
         # Display options
         console.print("\n[bold green]Generated commit messages:\n[/bold green]")
 
@@ -82,17 +141,16 @@ def generate(
         table.add_column("Confidence", justify="right", width=10)
 
         for i, msg in enumerate(options.options, 1):
-            formatted = msg.format(include_body=False)
             confidence = f"{msg.confidence:.0%}"
-            table.add_row(str(i), formatted, confidence)
+            table.add_row(str(i), formatted_short[i - 1], confidence)
 
-        console.print(table)
+        _emit(table)
 
         # User selection
         while True:
             choice = Prompt.ask(
                 "\nSelect an option:",
-                choices=[str(i) for i in range(1, len(options.options) + 1)] + ["preview", "quit"],
+                choices=choices,
                 default="1"
             )
 
@@ -102,32 +160,29 @@ def generate(
 
             if choice == "preview":
                 console.print("\n[bold]Full message previews:[/bold]\n")
-                for i, msg in enumerate(options.options, 1):
+                for i, formatted in enumerate(formatted_full, 1):
                     console.print(f"[bold cyan]Option {i}:[/bold cyan]")
-                    console.print(Panel(msg.format(), border_style="dim"))
+                    console.print(Panel(formatted, border_style="dim"))
                     console.print()
                 continue  # Go back to selection prompt
 
             # If we get here, it's a valid number selection
             break
 
-        selected = options.options[int(choice) - 1]
-
+        # Already formatted above, reuse it for every display/edit below
+        selected_text = formatted_full[int(choice) - 1]
 
         # Show full message
         console.print("\n[bold]Selected commit message:[/bold]")
-        console.print(Panel(selected.format(), border_style="green"))
+        console.print(Panel(selected_text, border_style="green"))
 
         # Edit option
+        message_to_use = selected_text
         if Confirm.ask("Do you want to edit this message?", default=False):
-            edited = typer.edit(selected.format())
+            edited = typer.edit(selected_text)
             if edited:
                 message_to_use = edited.strip()
                 console.print("[green]Message has been edited.[/green]")
-            else:
-                message_to_use = selected.format()
-        else:
-            message_to_use = selected.format()
 
         # if --unstaged, do not commit, otherwise full speed ahead
         if use_unstaged:
@@ -136,13 +191,8 @@ def generate(
             console.print("\n[dim]Copy this message to commit manually:[/dim]")
             console.print(Panel(message_to_use, border_style="dim"))
         elif cfg.auto_commit or Confirm.ask("Do you want to commit this message?", default=True):
-            repo = git_handler.get_repo()
-
-            if not git_handler.has_staged_changes():
-                console.print("[red]No staged changes found.[/red]")
-                raise typer.Exit(1)
-
-            repo.index.commit(message_to_use)
+            # The staged diff was checked when the context was loaded
+            git_ctx.repo.index.commit(message_to_use)
             console.print("[green]Committed successfully![/green]")
         else:
             console.print("\n[dim]Copy this message to commit manually:[/dim]")
@@ -155,6 +205,28 @@ def generate(
 
 @app.command(help="List available LLM providers and their configuration status")
 def providers():
+    from .providers import check_api_key
+
+    rows = [
+        (
+            info["name"],
+            info["default_model"],
+            "Yes" if info["requires_api_key"] else "No",
+            "✓" if check_api_key(provider) else "✗"
+        )
+        for provider in Provider
+        for info in (get_provider_info(provider),)
+    ]
+
+    # Plain tab-separated rows when piped, skipping Rich's layout entirely
+    if not sys.stdout.isatty():
+        for row in rows:
+            print("\t".join(row))
+        return
+
+    from rich.table import Table
+
+    console = get_console()
     console.print("[bold blue]Available LLM Providers:[/bold blue]\n")
 
     table = Table(show_header=True, header_style="bold magenta")
@@ -163,24 +235,20 @@ def providers():
     table.add_column("API Key Required", style="yellow")
     table.add_column("API Key Set", style="dim")
 
-    for provider in Provider:
-        info = get_provider_info(provider)
-        api_key_required = "Yes" if info["requires_api_key"] else "No"
-        api_key_set = "✓" if check_api_key(provider) else "✗"
-
-        table.add_row(
-            info["name"],
-            info["default_model"],
-            api_key_required,
-            api_key_set
-        )
+    for row in rows:
+        table.add_row(*row)
 
-    console.print(table)
+    _emit(table)
     console.print("\n[dim]Usage: mint --provider <provider> --model <model>[/dim]")
 
 
 @app.command(help="Initialize CommitMint with .env and config files")
 def setup():
+    from rich.prompt import Confirm
+
+    from .config import create_default_config, get_config_path
+
+    console = get_console()
     console.print("[bold blue]CommitMint Setup[/bold blue]\n")
 
     # Create .env file
@@ -208,8 +276,7 @@ OPENAI_API_KEY=your-openai-api-key-here
 # Google Gemini
 # GOOGLE_API_KEY=your-google-api-key-here
 """
-        with open(env_path, 'w') as f:
-            f.write(env_content)
+        env_path.write_text(env_content)
 
         console.print(f"[green]✓[/green] Created .env file")
         console.print(f"[dim]   {env_path.absolute()}[/dim]")
@@ -232,21 +299,35 @@ OPENAI_API_KEY=your-openai-api-key-here
         console.print(f"[dim]   {config_path}[/dim]")
 
     # Final instructions
-    console.print(f"\n[bold green]Setup complete![/bold green]")
-    console.print(f"\n[yellow]Next steps:[/yellow]")
-    console.print(f"  1. Edit .env and add your API key")
-    console.print(f"  2. Read the README")
+    console.print("\n".join([
+        "\n[bold green]Setup complete![/bold green]",
+        "\n[yellow]Next steps:[/yellow]",
+        "  1. Edit .env and add your API key",
+        "  2. Read the README",
+    ]))
+
+
+_OPT_INIT = typer.Option(False, "--init", help="Create a default config file")
+_OPT_SHOW = typer.Option(False, "--show", help="Show current configuration")
+_OPT_EDIT = typer.Option(False, "--edit", help="Open config file in editor")
+_OPT_SET_PROVIDER = typer.Option(None, "--set-provider", help="Set default provider")
+_OPT_SET_MODEL = typer.Option(None, "--set-model", help="Set default model")
+_OPT_SET_TEMPERATURE = typer.Option(None, "--set-temp", help="Set default temperature")
+
 
 @app.command(help="Manage CommitMint configuration (~/.mintrc)")
 def config(
-        init: bool = typer.Option(False, "--init", help="Create a default config file"),
-        show: bool = typer.Option(False, "--show", help="Show current configuration"),
-        edit: bool = typer.Option(False, "--edit", help="Open config file in editor"),
-        set_provider: str = typer.Option(None, "--set-provider", help="Set default provider"),
-        set_model: str = typer.Option(None, "--set-model", help="Set default model"),
-        set_temperature: float = typer.Option(None, "--set-temp", help="Set default temperature")
+        init: bool = _OPT_INIT,
+        show: bool = _OPT_SHOW,
+        edit: bool = _OPT_EDIT,
+        set_provider: str = _OPT_SET_PROVIDER,
+        set_model: str = _OPT_SET_MODEL,
+        set_temperature: float = _OPT_SET_TEMPERATURE
 ):
     # Configure CommitMint settings
+    from .config import load_config, save_config, create_default_config, get_config_path
+
+    console = get_console()
 
     if init:
         config_path = create_default_config()
@@ -268,12 +349,20 @@ def config(
         current_config = load_config()
         config_path = get_config_path()
 
-        console.print(f"[bold blue]Current Configuration[/bold blue] ({config_path})\n")
-
-        config_dict = current_config.model_dump()
+        config_dict = asdict(current_config)
         config_dict['provider'] = config_dict['provider'].value
+        config_dict['fallback_providers'] = ", ".join(p.value for p in current_config.fallback_providers) or "none"
         config_dict['model'] = config_dict['model'] or f"{DEFAULT_MODELS[current_config.provider]} (default)"
 
+        if not sys.stdout.isatty():
+            for key, value in config_dict.items():
+                print(f"{key}\t{value}")
+            return
+
+        from rich.table import Table
+
+        console.print(f"[bold blue]Current Configuration[/bold blue] ({config_path})\n")
+
         table = Table(show_header=False, box=None)
         table.add_column("Setting", style="cyan")
         table.add_column("Value", style="green")
@@ -284,19 +373,20 @@ def config(
         console.print(table)
         return
 
-    if any([set_provider, set_model, set_temperature]):
+    if set_provider is not None or set_model is not None or set_temperature is not None:
         current_config = load_config()
 
-        if set_provider:
-            try:
-                current_config.provider = Provider(set_provider)
-                console.print(f"[green]✓[/green] Set provider to: {set_provider}")
-            except ValueError:
+        if set_provider is not None:
+            member = Provider._value2member_map_.get(set_provider)
+            if member is None:
                 console.print(f"[red]Invalid provider: {set_provider}[/red]")
                 console.print(f"Valid options: {', '.join(p.value for p in Provider)}")
                 raise typer.Exit(1)
 
-        if set_model:
+            current_config.provider = member
+            console.print(f"[green]✓[/green] Set provider to: {set_provider}")
+
+        if set_model is not None:
             current_config.model = set_model
             console.print(f"[green]✓[/green] Set model to: {set_model}")
 
@@ -308,20 +398,22 @@ def config(
         console.print(f"\n[dim]Saved to: {config_path}[/dim]")
         return
 
-    console.print("[bold blue]CommitMint Configuration[/bold blue]\n")
-    console.print("Usage:")
-    console.print("  mint config --init          Create default config")
-    console.print("  mint config --show          Show current config")
-    console.print("  mint config --edit          Edit config file")
-    console.print("  mint config --set-provider openai")
-    console.print("  mint config --set-model gpt-5")
-    console.print("  mint config --set-temp 0.3")
+    console.print("\n".join([
+        "[bold blue]CommitMint Configuration[/bold blue]\n",
+        "Usage:",
+        "  mint config --init          Create default config",
+        "  mint config --show          Show current config",
+        "  mint config --edit          Edit config file",
+        "  mint config --set-provider openai",
+        "  mint config --set-model gpt-5",
+        "  mint config --set-temp 0.3",
+    ]))
 
 
 @app.callback(invoke_without_command=True)
 def main(ctx: typer.Context):
     if ctx.invoked_subcommand is None:
-        console.print(ctx.get_help())
+        get_console().print(ctx.get_help())
 
 
 if __name__ == "__main__":
@@ -1,100 +1,165 @@
+from dataclasses import dataclass, replace
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
-import yaml
-from pydantic import BaseModel, Field, ValidationError
-from .providers import Provider, DEFAULT_MODELS
-
-
-class MintConfig(BaseModel):
-    provider: Provider = Field(default=Provider.OPENAI)
-    model: Optional[str] = Field(default=None)
-    temperature: float = Field(default=0.25, ge=0.0, le=1.0)
-    auto_commit: bool = Field(default=False)
-    num_options: int = Field(default=5, ge=1, le=10)
+from .providers_types import Provider, DEFAULT_MODELS
+
+
+@dataclass
+class MintConfig:
+    provider: Provider = Provider.OPENAI
+    # A tuple so the shallow copies load_config hands out cannot share it with the cache
+    fallback_providers: tuple[Provider, ...] = ()
+    model: Optional[str] = None
+    temperature: float = 0.25
+    auto_commit: bool = False
+    num_options: int = 5
+
+    def __post_init__(self):
+        # Plain dataclass keeps pydantic off the CLI startup path
+        if not 0.0 <= self.temperature <= 1.0:
+            raise ValueError(f"temperature must be between 0.0 and 1.0, got {self.temperature}")
+        if not 1 <= self.num_options <= 10:
+            raise ValueError(f"num_options must be between 1 and 10, got {self.num_options}")
 
     def get_model(self) -> str:
         return self.model or DEFAULT_MODELS[self.provider]
 
 
+_CONFIG_TEMPLATE = """# CommitMint Configuration
+# This file configures default behavior for mint
+
+# LLM Provider (openai, anthropic, google)
+provider: {provider}
+
+# Providers to try, in order, if the main one fails (e.g. [anthropic, google])
+fallback_providers: {fallback_providers}
+
+# Model name (leave empty to use provider default)
+model: {model}
+
+# Temperature for generation (0.0 = deterministic, 1.0 = creative)
+temperature: {temperature}
+
+# Auto-commit without confirmation prompt
+auto_commit: {auto_commit}
+
+# Number of commit message options to generate (1-10)
+num_options: {num_options}
+"""
+
+
+@lru_cache(maxsize=1)
 def get_config_path() -> Path:
     return Path.home() / ".mintrc"
 
 
-def load_config() -> MintConfig:
-    #Load configuration from file, or return defaults
-    config_path = get_config_path()
+def _parse_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in ("true", "yes", "on"):
+        return True
+    if lowered in ("false", "no", "off"):
+        return False
+    raise ValueError(f"Invalid boolean: {value}")
 
-    if not config_path.exists():
-        return MintConfig()
 
-    try:
-        with open(config_path, 'r') as f:
-            data = yaml.safe_load(f)
-            if data is None:
-                return MintConfig()
-            return MintConfig(**data)
-    except (yaml.YAMLError, IOError, OSError, ValidationError):
-        return MintConfig()
+# YAML spellings of "no value"
+_NULL_VALUES = {"", "null", "~"}
 
 
-def save_config(config: MintConfig) -> Path:
-    config_path = get_config_path()
+def _parse_optional_str(value: str) -> Optional[str]:
+    return None if value.lower() in _NULL_VALUES else value
 
-    # Ensure parent directory exists
-    config_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Write the config with comments
-    config_content = f"""# CommitMint Configuration
-# This file configures default behavior for mint
+def _parse_providers(value: str) -> tuple[Provider, ...]:
+    # YAML flow list, e.g. [anthropic, google]
+    items = value.strip("[]")
+    if items.strip().lower() in _NULL_VALUES:
+        return ()
+    return tuple(
+        Provider(item.strip().strip("'\""))
+        for item in items.split(",")
+        if item.strip()
+    )
 
-# LLM Provider (openai, anthropic, google)
-provider: {config.provider.value}
 
-# Model name (leave empty to use provider default)
-model: {config.model if config.model else 'null'}
+_FIELD_PARSERS = {
+    "provider": Provider,
+    "fallback_providers": _parse_providers,
+    "model": _parse_optional_str,
+    "temperature": float,
+    "auto_commit": _parse_bool,
+    "num_options": int,
+}
 
-# Temperature for generation (0.0 = deterministic, 1.0 = creative)
-temperature: {config.temperature}
 
-# Auto-commit without confirmation prompt
-auto_commit: {str(config.auto_commit).lower()}
+def _parse_config(text: str) -> dict:
+    # ~/.mintrc only holds flat `key: value` pairs, so skip a full YAML parser
+    data = {}
+    for line in text.splitlines():
+        line = line.partition(" #")[0].strip()
+        if not line or line.startswith("#") or ":" not in line:
+            continue
 
-# Number of commit message options to generate (1-10)
-num_options: {config.num_options}
-"""
+        key, _, value = line.partition(":")
+        key = key.strip()
+        value = value.strip()
+        if key not in _FIELD_PARSERS:
+            continue
 
-    with open(config_path, 'w') as f:
-        f.write(config_content)
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
 
-    return config_path
+        data[key] = _FIELD_PARSERS[key](value)
+    return data
 
 
-def create_default_config() -> Path:
-    # Create a default config file at ~/.mintrc
+@lru_cache(maxsize=4)
+def _load_cached(path_str: str, mtime_ns: int) -> MintConfig:
+    # Keyed on mtime so edits to ~/.mintrc are picked up without a manual reset
+    try:
+        data = _parse_config(Path(path_str).read_text())
+        return MintConfig(**data)
+    except (OSError, ValueError):
+        return MintConfig()
+
+
+def load_config() -> MintConfig:
+    #Load configuration from file, or return defaults
     config_path = get_config_path()
 
-    config_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mtime_ns = config_path.stat().st_mtime_ns
+    except OSError:
+        return MintConfig()
 
-    default_config = """# CommitMint Configuration
-# This file configures default behavior for mint
+    # Hand out a copy so callers can override fields without mutating the cache
+    return replace(_load_cached(str(config_path), mtime_ns))
 
-# LLM Provider (openai, anthropic, google)
-provider: openai
 
-# Model name (leave empty to use provider default)
-model: null
+load_config.cache_clear = _load_cached.cache_clear
 
-# Temperature for generation (0.0 = deterministic, 1.0 = creative)
-temperature: 0.25
 
-# Auto-commit without confirmation prompt
-auto_commit: false
+def save_config(config: MintConfig) -> Path:
+    config_path = get_config_path()
 
-# Number of commit message options to generate (1-10)
-num_options: 5
-"""
+    # Ensure parent directory exists
+    config_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(config_path, 'w') as f:
-        f.write(default_config)
+    # Write the config with comments
+    config_path.write_text(_CONFIG_TEMPLATE.format(
+        provider=config.provider.value,
+        fallback_providers=f"[{', '.join(p.value for p in config.fallback_providers)}]",
+        model=config.model if config.model else 'null',
+        temperature=config.temperature,
+        auto_commit=str(config.auto_commit).lower(),
+        num_options=config.num_options,
+    ))
+
+    load_config.cache_clear()
+    return config_path
 
-    return config_path
\ No newline at end of file
+
+def create_default_config() -> Path:
+    # Create a default config file at ~/.mintrc
+    return save_config(MintConfig())
\ No newline at end of file
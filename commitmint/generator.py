@@ -1,19 +1,121 @@
-from pathlib import Path
+import re
+from functools import cache, lru_cache
+from importlib.resources import files
+from typing import Callable, Iterator
 
-from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from .models import DiffAnalysis, CommitOptions
-from .providers import Provider, get_llm
+from . import result_cache
+from .models import DiffAnalysis, CommitMessage, CommitOptions
+from .providers import Provider, check_api_key, get_fallback_errors, get_llm
 
+# Resolved through the package loader so prompts are found from wheels and zipapps too
+_PROMPTS_DIR = files("commitmint") / "prompts"
 
+# Passed as a plain JSON schema so every provider streams partial dicts instead of one final object
+_RESPONSE_SCHEMA = CommitOptions.model_json_schema()
+
+# Each provider's native structured output mode
+_STRUCTURED_OUTPUT_METHODS = {
+    Provider.OPENAI: "json_schema",
+    Provider.ANTHROPIC: "function_calling",
+    Provider.GOOGLE: "json_schema",
+}
+
+# Rough chars-per-token ratio, close enough for budgeting without a provider-specific tokenizer
+_CHARS_PER_TOKEN = 4
+_DIFF_TOKEN_BUDGET = 1000
+
+# The model gains little from hundreds of file names; the totals still cover every file
+_MAX_LISTED_FILES = 50
+_FILE_LINE = "- {0.path}: +{0.additions} -{0.deletions}"
+
+_FILE_SPLIT = re.compile(r"^(?=diff --git )", re.MULTILINE)
+_HUNK_SPLIT = re.compile(r"^(?=@@ )", re.MULTILINE)
+
+
+@lru_cache(maxsize=None)
 def load_prompt(file: str) -> str:
-    prompts_dir = Path(__file__).parent / "prompts"
-    prompt_file = prompts_dir / file
+    prompt_file = _PROMPTS_DIR / file
 
-    if not prompt_file.exists():
+    if not prompt_file.is_file():
         raise FileNotFoundError(f"{file} not found")
 
-    return prompt_file.read_text().strip()
+    return prompt_file.read_text(encoding="utf-8").strip()
+
+
+def _select_hunks(diff_text: str, token_budget: int) -> str:
+    max_chars = token_budget * _CHARS_PER_TOKEN
+    if len(diff_text) <= max_chars:
+        return diff_text
+
+    # (file header, [hunks]) per file in the diff
+    files = []
+    for block in _FILE_SPLIT.split(diff_text):
+        if block:
+            header, *hunks = _HUNK_SPLIT.split(block)
+            files.append((header, hunks))
+
+    # Most changed lines first, ties in diff order; context lines carry no signal about the change itself
+    candidates = sorted(
+        (
+            (sum(1 for line in hunk.splitlines()[1:] if line.startswith(("+", "-"))), file_idx, hunk_idx)
+            for file_idx, (_, hunks) in enumerate(files)
+            for hunk_idx, hunk in enumerate(hunks)
+        ),
+        key=lambda candidate: (-candidate[0], candidate[1], candidate[2])
+    )
+
+    selected = set()
+    used_files = set()
+    used = 0
+    for _, file_idx, hunk_idx in candidates:
+        header, hunks = files[file_idx]
+        cost = len(hunks[hunk_idx]) + (0 if file_idx in used_files else len(header))
+        if used + cost > max_chars:
+            continue
+        selected.add((file_idx, hunk_idx))
+        used_files.add(file_idx)
+        used += cost
+
+    if not selected:
+        return diff_text[:max_chars] + "\n...(truncated)"
+
+    # Keep the original file and hunk order so the excerpt still reads as a diff
+    parts = []
+    for file_idx, (header, hunks) in enumerate(files):
+        if file_idx in used_files:
+            parts.append(header)
+            parts.extend(hunk for hunk_idx, hunk in enumerate(hunks) if (file_idx, hunk_idx) in selected)
+
+    return "".join(parts).rstrip("\n") + "\n...(truncated)"
+
+
+@cache
+def _get_prompt(provider: Provider) -> ChatPromptTemplate:
+    system_prompt = load_prompt("system_prompt.txt")
+    if provider == Provider.ANTHROPIC:
+        # Anthropic only caches prompt prefixes that are explicitly marked. Prefixes under 1024 tokens
+        # are never cached, and today's prompt plus tool schema is under 500, so this is inert until it grows
+        system_prompt = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+    # The static system block comes first and the diff-dependent human message last
+    return ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        ("human", load_prompt("human_prompt.txt"))
+    ])
+
+
+def _get_structured_llm(provider: Provider, model_name: str = None, temperature: float = 0.25):
+    llm = get_llm(provider, model_name, temperature)
+    return llm.with_structured_output(_RESPONSE_SCHEMA, method=_STRUCTURED_OUTPUT_METHODS[provider])
+
+
+def usable_fallbacks(provider: Provider, fallback_providers) -> list[Provider]:
+    # Backups that will actually be tried: listed once, not the primary, and with an API key set
+    return [
+        fallback for fallback in dict.fromkeys(fallback_providers)
+        if fallback != provider and check_api_key(fallback)
+    ]
 
 
 def generate_messages(
@@ -21,8 +123,11 @@ def generate_messages(
     analysis: DiffAnalysis,
     provider: Provider = None,
     model_name: str = None,
-    temperature: float = None
-) -> CommitOptions:
+    temperature: float = None,
+    fallback_providers=None,
+    use_cache: bool = True,
+    on_fallback: Callable[[Provider], None] = None
+) -> Iterator[CommitMessage]:
     from .config import load_config
     cfg = load_config()
 
@@ -32,29 +137,56 @@ def generate_messages(
         model_name = cfg.get_model()
     if temperature is None:
         temperature = cfg.temperature
-
-    llm = get_llm(provider, model_name, temperature)
-    parser = PydanticOutputParser(pydantic_object=CommitOptions)
-
-    system_prompt = load_prompt("system_prompt.txt")
-    human_prompt = load_prompt("human_prompt.txt")
-
-    prompt = ChatPromptTemplate.from_messages([("system", system_prompt), ("human", human_prompt)])
-
-    chain = prompt | llm | parser
-
-    file_list = "\n".join(
-        f"- {f.path}: +{f.additions} -{f.deletions}"
-        for f in analysis.files_changed
+    if fallback_providers is None:
+        fallback_providers = cfg.fallback_providers
+
+    changed_files = analysis.files_changed
+    file_list = "\n".join(map(_FILE_LINE.format, changed_files[:_MAX_LISTED_FILES]))
+    if len(changed_files) > _MAX_LISTED_FILES:
+        file_list += f"\n...({len(changed_files) - _MAX_LISTED_FILES} more files)"
+
+    # Same inputs and prompts give the same request, so a re-run can skip the model entirely
+    cache_key = result_cache.make_key(
+        provider.value, model_name, round(temperature, 3), diff_text, file_list,
+        load_prompt("system_prompt.txt"), load_prompt("human_prompt.txt")
     )
-
-    max_length = 3500
-    truncated_diff = diff_text[:max_length]
-    if len(truncated_diff) > max_length:
-        truncated_diff += "\n...(truncated)"
-
-    result = chain.invoke({
-        "format_instructions": parser.get_format_instructions(),
+    if use_cache:
+        cached = result_cache.load(cache_key)
+        if cached:
+            yield from cached
+            return
+
+    chain = _get_prompt(provider) | _get_structured_llm(provider, model_name, temperature)
+
+    # with_fallbacks only starts a backup once every chain before it has failed,
+    # so the last provider recorded here is the one that answered
+    served = [provider]
+
+    def _record(fallback: Provider):
+        def on_start(run):
+            served.append(fallback)
+            if on_fallback is not None:
+                on_fallback(fallback)
+        return on_start
+
+    # Backups use their own default model; the configured model name belongs to the primary provider
+    backups = usable_fallbacks(provider, fallback_providers)
+    if backups:
+        chain = chain.with_fallbacks(
+            [
+                (_get_prompt(fallback) | _get_structured_llm(fallback, None, temperature))
+                .with_listeners(on_start=_record(fallback))
+                for fallback in backups
+            ],
+            # Only transient provider failures move on; a rejected request or bad key would fail again
+            exceptions_to_handle=tuple(
+                error for p in (provider, *backups[:-1]) for error in get_fallback_errors(p)
+            )
+        )
+
+    truncated_diff = _select_hunks(diff_text, _DIFF_TOKEN_BUDGET)
+
+    stream = chain.stream({
         "num_files": len(analysis.files_changed),
         "additions": analysis.total_additions,
         "deletions": analysis.total_deletions,
@@ -62,4 +194,19 @@ def generate_messages(
         "diff_content": truncated_diff
     })
 
-    return result
\ No newline at end of file
+    # An option is complete once the model has started writing the next one
+    generated = []
+    options = []
+    for partial in stream:
+        options = (partial or {}).get("options") or []
+        while len(generated) < len(options) - 1:
+            generated.append(CommitMessage.model_validate(options[len(generated)]))
+            yield generated[-1]
+
+    for raw in options[len(generated):]:
+        generated.append(CommitMessage.model_validate(raw))
+        yield generated[-1]
+
+    # The key names the primary provider, so a backup's answer is not stored under it
+    if generated and served[-1] == provider:
+        result_cache.store(cache_key, generated)
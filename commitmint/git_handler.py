@@ -1,66 +1,77 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
 import git
 from .models import DiffAnalysis, FileDiff
 
 
-def get_repo(path: str = ".") -> git.Repo:
-    return git.Repo(path, search_parent_directories=True)
-
-
-def get_staged_diff(path: str = ".") -> str:
-    repo = get_repo(path)
-    return repo.git.diff("--cached", universal_newlines=True, encoding="utf-8")
-
-
-def get_unstaged_diff(path: str = ".") -> str:
-    repo = get_repo(path)
-    return repo.git.diff(encoding="utf-8")
-
+@lru_cache(maxsize=16)
+def _discover_repo_root(path: str) -> str:
+    return git.Repo(path, search_parent_directories=True).working_dir
 
-def has_staged_changes(path: str = ".") -> bool:
-    return bool(get_staged_diff(path))
 
+def get_repo(path: str = ".") -> git.Repo:
+    # Opening the exact root skips the parent-directory walk after the first lookup
+    return git.Repo(_discover_repo_root(os.path.abspath(path)))
 
-def parse_diff(diff: str, path: str = ".") -> DiffAnalysis:
-    if not diff:
-        return DiffAnalysis(
-            files_changed=[],
-            total_additions=0,
-            total_deletions=0,
-            change_summary="No changes were detected."
-        )
 
+def _parse_numstat(stats: str) -> DiffAnalysis:
     files = []
     total_add = 0
     total_delete = 0
 
-    # Parsing diff stats
-    try:
-        repo = get_repo(path)
-        stats = repo.git.diff("--cached", "--stat", encoding="utf-8")
-        for line in stats.split('\n')[:-1]:
-            if '|' in line:
-                parts = line.split('|')
-                path = parts[0].strip()
-                changes = parts[1].strip().split()
-
-                add = changes[0].count('+') if changes else 0
-                delete = changes[0].count('-') if changes else 0
-
-                total_add += add
-                total_delete += delete
-
-                files.append(FileDiff(
-                    path=path,
-                    additions=add,
-                    deletions=delete,
-                    changes_summary=f"{add} additions, {delete} deletions"
-                ))
-    except (git.exc.GitCommandError, IndexError, AttributeError) as e:
-        pass
+    for line in stats.splitlines():
+        parts = line.split('\t', 2)
+        if len(parts) != 3:
+            continue
+
+        # Binary files report "-" for both counts
+        add = int(parts[0]) if parts[0] != '-' else 0
+        delete = int(parts[1]) if parts[1] != '-' else 0
+
+        total_add += add
+        total_delete += delete
+
+        files.append(FileDiff(
+            path=parts[2],
+            additions=add,
+            deletions=delete,
+            changes_summary=f"{add} additions, {delete} deletions"
+        ))
 
     return DiffAnalysis(
         files_changed=files,
         total_additions=total_add,
         total_deletions=total_delete,
         change_summary=f"{len(files)} files changed."
-    )
\ No newline at end of file
+    )
+
+
+def _diff_and_stats(repo: git.Repo, *args: str) -> tuple[str, DiffAnalysis]:
+    # One git call: the numstat block comes first, then the patch starting at the first "diff --git"
+    output = repo.git.diff(*args, "--numstat", "-p", encoding="utf-8")
+
+    if output.startswith("diff --git "):
+        stats, diff = "", output
+    else:
+        stats, sep, diff = output.partition("\ndiff --git ")
+        if sep:
+            diff = "diff --git " + diff
+
+    return diff, _parse_numstat(stats)
+
+
+@dataclass
+class GitContext:
+    repo: git.Repo
+    diff: str
+    analysis: DiffAnalysis
+
+
+def load_git_context(path: str = ".", staged: bool = True) -> GitContext:
+    # Discover the repo and diff it once; the CLI threads the result through the whole run
+    repo = get_repo(path)
+    diff, analysis = _diff_and_stats(repo, "--cached") if staged else _diff_and_stats(repo)
+    return GitContext(repo=repo, diff=diff, analysis=analysis)
+
@@ -1,4 +1,5 @@
 from enum import Enum
+from functools import cached_property
 from pydantic import BaseModel, Field
 from typing import List
 
@@ -37,11 +38,13 @@ class CommitMessage(BaseModel):
 
     def format(self, include_body: bool = True) -> str:
         scope_str = f"({self.scope})" if self.scope else ""
-        msg = f"{self.type.value}{scope_str}: {self.subject}"
-        if include_body and self.body:
-            msg += f"\n\n{self.body}"
-        return msg
+        body_str = f"\n\n{self.body}" if include_body and self.body else ""
+        return f"{self.type.value}{scope_str}: {self.subject}{body_str}"
 
 
 class CommitOptions(BaseModel):
-    options: List[CommitMessage] = Field(min_length=1, max_length=5)
\ No newline at end of file
+    options: List[CommitMessage] = Field(min_length=1, max_length=5)
+
+    @cached_property
+    def option_choices(self) -> tuple[str, ...]:
+        return tuple(str(i) for i in range(1, len(self.options) + 1))
\ No newline at end of file
@@ -1,55 +1,116 @@
-from enum import Enum
+import importlib
+import os
+from functools import lru_cache
 from typing import Optional
 
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+# Provider metadata lives in providers_types so it can be imported without the LLM SDKs
+from .providers_types import Provider, DEFAULT_MODELS, API_KEY_VARS, get_provider_info
 
+# The SDK chat classes stay reachable through __getattr__ but are left out so `import *` stays lazy
+__all__ = [
+    "Provider",
+    "DEFAULT_MODELS",
+    "API_KEY_VARS",
+    "get_provider_info",
+    "get_llm",
+    "get_fallback_errors",
+    "check_api_key",
+]
 
-class Provider(str, Enum):
-    OPENAI = "openai"
-    ANTHROPIC = "anthropic"
-    GOOGLE = "google"
-
-
-DEFAULT_MODELS = {
-    Provider.OPENAI: "gpt-5",
-    Provider.ANTHROPIC: "claude-sonnet-4-5",
-    Provider.GOOGLE: "gemini-2.5-flash"
+# (module, class, pip package) per provider; each SDK is only imported when its provider is used
+_LLM_CLASSES = {
+    Provider.OPENAI: ("langchain_openai", "ChatOpenAI", "langchain-openai"),
+    Provider.ANTHROPIC: ("langchain_anthropic", "ChatAnthropic", "langchain-anthropic"),
+    Provider.GOOGLE: ("langchain_google_genai", "ChatGoogleGenerativeAI", "langchain-google-genai"),
 }
 
-API_KEY_VARS = {
-    Provider.OPENAI: "OPENAI_API_KEY",
-    Provider.ANTHROPIC: "ANTHROPIC_API_KEY",
-    Provider.GOOGLE: "GOOGLE_API_KEY",
+# (module, class) pairs for failures another provider might not hit: rate limits, timeouts,
+# connection drops and 5xx responses. Auth and bad-request errors surface instead of falling back
+_FALLBACK_ERRORS = {
+    Provider.OPENAI: tuple(
+        ("openai", name)
+        for name in ("RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError")
+    ),
+    Provider.ANTHROPIC: tuple(
+        ("anthropic", name)
+        for name in (
+            "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",
+            "ServiceUnavailableError", "OverloadedError",
+        )
+    ),
+    Provider.GOOGLE: (
+        # langchain-google-genai 4.x, on google-genai over httpx
+        ("google.genai.errors", "ServerError"),
+        ("langchain_google_genai.chat_models", "GoogleRateLimitError"),
+        ("httpx", "TransportError"),
+        # langchain-google-genai 3.x, on google-api-core
+        ("google.api_core.exceptions", "TooManyRequests"),
+        ("google.api_core.exceptions", "ServerError"),
+    ),
 }
 
+# Stable across runs so OpenAI routes repeat requests to the same cached system prompt.
+# OpenAI only caches prompts of 1024+ tokens, so this takes effect once the system prompt grows past that
+_OPENAI_PROMPT_CACHE_KEY = "commitmint-v1"
+
+
+def _import_llm_class(provider: Provider):
+    module_name, class_name, package = _LLM_CLASSES[provider]
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(
+            f"The {provider.value} provider requires {package}. Install it with: pip install {package}"
+        ) from e
+    return getattr(module, class_name)
+
+
+def __getattr__(name: str):
+    # Keep `from commitmint.providers import ChatOpenAI` working without eager SDK imports
+    for provider, (_, class_name, _) in _LLM_CLASSES.items():
+        if name == class_name:
+            return _import_llm_class(provider)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Clients hold their own HTTP connection pools, so reuse them for identical settings
+@lru_cache(maxsize=8)
 def get_llm(provider: Provider, model: Optional[str] = None, temperature: float = 0.25):
     if model is None:
         model = DEFAULT_MODELS[provider]
 
     if provider == Provider.OPENAI:
-        return ChatOpenAI(model=model, temperature=temperature)
+        ChatOpenAI = _import_llm_class(Provider.OPENAI)
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            extra_body={"prompt_cache_key": _OPENAI_PROMPT_CACHE_KEY}
+        )
 
     elif provider == Provider.ANTHROPIC:
+        ChatAnthropic = _import_llm_class(Provider.ANTHROPIC)
         return ChatAnthropic(model_name=model, temperature=temperature)
 
     elif provider == Provider.GOOGLE:
+        ChatGoogleGenerativeAI = _import_llm_class(Provider.GOOGLE)
         return ChatGoogleGenerativeAI(model=model, temperature=temperature)
 
     else:
         raise ValueError(f"Unsupported provider: {provider}")
 
-def check_api_key(provider: Provider) -> bool:
-    import os
 
+def get_fallback_errors(provider: Provider) -> tuple[type[Exception], ...]:
+    errors = []
+    for module_name, class_name in _FALLBACK_ERRORS[provider]:
+        # Each SDK version ships a different subset; skip whatever this install lacks
+        try:
+            errors.append(getattr(importlib.import_module(module_name), class_name))
+        except (ImportError, AttributeError):
+            continue
+    return tuple(errors)
+
+
+def check_api_key(provider: Provider) -> bool:
     key_var = API_KEY_VARS.get(provider)
-    return bool(os.environ.get(key_var))
-
-def get_provider_info(provider: Provider) -> dict:
-    return {
-        "name": provider.value,
-        "default_model": DEFAULT_MODELS[provider],
-        "api_key_var": API_KEY_VARS[provider],
-        "requires_api_key": API_KEY_VARS[provider] is not None
-    }
+    # An empty value (e.g. OPENAI_API_KEY= in .env) still counts as unset
+    return key_var is not None and bool(os.environ.get(key_var))
\ No newline at end of file
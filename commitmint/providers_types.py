@@ -0,0 +1,30 @@
+from enum import Enum
+from functools import lru_cache
+
+
+class Provider(str, Enum):
+    OPENAI = "openai"
+    ANTHROPIC = "anthropic"
+    GOOGLE = "google"
+
+
+DEFAULT_MODELS = {
+    Provider.OPENAI: "gpt-5",
+    Provider.ANTHROPIC: "claude-sonnet-4-5",
+    Provider.GOOGLE: "gemini-2.5-flash"
+}
+
+API_KEY_VARS = {
+    Provider.OPENAI: "OPENAI_API_KEY",
+    Provider.ANTHROPIC: "ANTHROPIC_API_KEY",
+    Provider.GOOGLE: "GOOGLE_API_KEY",
+}
+
+@lru_cache(maxsize=None)
+def get_provider_info(provider: Provider) -> dict:
+    return {
+        "name": provider.value,
+        "default_model": DEFAULT_MODELS[provider],
+        "api_key_var": API_KEY_VARS[provider],
+        "requires_api_key": API_KEY_VARS[provider] is not None
+    }
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .models import CommitMessage, CommitOptions
+
+# Entries older than this are pruned whenever a new result is stored
+MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+
+
+def get_cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "commitmint" / "results.db"
+
+
+def make_key(*parts) -> str:
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    cache_path = get_cache_path()
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(cache_path)
+    try:
+        # Commits on success, rolls back on error
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, created REAL NOT NULL, messages TEXT NOT NULL)"
+            )
+            yield conn
+    finally:
+        conn.close()
+
+
+def load(key: str) -> Optional[List[CommitMessage]]:
+    # The cache is best effort; any failure just means asking the model again
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT messages FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        # Validated as a whole set so an entry the CLI would reject reads as a miss
+        return CommitOptions.model_validate({"options": json.loads(row[0])}).options
+    except (sqlite3.Error, OSError, ValueError):
+        return None
+
+
+def store(key: str, messages: List[CommitMessage]) -> None:
+    # A provider can ignore the schema's item limits; never cache a set every re-run would fail on
+    try:
+        CommitOptions(options=messages)
+    except ValueError:
+        return
+
+    payload = json.dumps([msg.model_dump(mode="json") for msg in messages])
+    now = time.time()
+    try:
+        with _connect() as conn:
+            conn.execute("DELETE FROM results WHERE created < ?", (now - MAX_AGE_SECONDS,))
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, created, messages) VALUES (?, ?, ?)",
+                (key, now, payload)
+            )
+    except (sqlite3.Error, OSError):
+        pass